@@ -1,18 +1,38 @@
 import os
+import threading
 import boto3
 
 AWS_REGION = "us-west-2"
 TABLE_NAME_BRIGHT_UID = "featuers_poc"  # Using existing table for testing
 TABLE_NAME_ACCOUNT_ID = "features_account_id"   # Partition key: account_id
 
-dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
+# Two tables with different partition keys, keyed by table_type
+TABLE_NAMES = {
+    "bright_uid": TABLE_NAME_BRIGHT_UID,
+    "account_id": TABLE_NAME_ACCOUNT_ID
+}
 
-# Two tables with different partition keys
-table_bright_uid = dynamodb.Table(TABLE_NAME_BRIGHT_UID)
-table_account_id = dynamodb.Table(TABLE_NAME_ACCOUNT_ID)
+# Valid table_type values, precomputed for O(1) membership checks
+TABLE_TYPES = frozenset(TABLE_NAMES)
 
-# Table mapping for easy access
-TABLES = {
-    "bright_uid": table_bright_uid,
-    "account_id": table_account_id
-}
\ No newline at end of file
+# DynamoDB resource and tables are created lazily on first use so that
+# importing the app does not build boto3 clients up front
+_dynamodb = None
+_tables = {}
+_lock = threading.Lock()
+
+def get_dynamodb():
+    """Return the shared DynamoDB resource, creating it on first use"""
+    global _dynamodb
+    if _dynamodb is None:
+        with _lock:
+            if _dynamodb is None:
+                _dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
+    return _dynamodb
+
+def get_table(table_type: str):
+    """Return the cached Table for table_type, or None if table_type is unknown"""
+    table = _tables.get(table_type)
+    if table is None and table_type in TABLE_NAMES:
+        table = _tables.setdefault(table_type, get_dynamodb().Table(TABLE_NAMES[table_type]))
+    return table
@@ -1,11 +1,12 @@
-from .config import TABLES
+import time
+from .config import get_dynamodb, get_table
 from .utils import dynamodb_to_dict, dict_to_dynamodb
 from .metrics import metrics, time_function, MetricNames
 
 @time_function(MetricNames.DYNAMODB_GET_ITEM)
 def get_item(identifier: str, category: str, table_type: str = "bright_uid"):
     """Get item from specified table type (bright_uid or account_id)"""
-    table = TABLES.get(table_type)
+    table = get_table(table_type)
     if not table:
         raise ValueError(f"Invalid table_type: {table_type}. Must be 'bright_uid' or 'account_id'")
     
@@ -29,35 +30,112 @@ def get_item(identifier: str, category: str, table_type: str = "bright_uid"):
     return item
 
 
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+
+@time_function(MetricNames.DYNAMODB_BATCH_GET_ITEM)
+def batch_get_items(identifier: str, categories: list, table_type: str = "bright_uid"):
+    """Get several categories for one identifier using BatchGetItem.
+    Returns a dict of category -> item for the categories that exist."""
+    table = get_table(table_type)
+    if not table:
+        raise ValueError(f"Invalid table_type: {table_type}. Must be 'bright_uid' or 'account_id'")
+    
+    # Use appropriate partition key based on table type (duplicates dropped, order kept)
+    keys = [{table_type: identifier, "category": category} for category in dict.fromkeys(categories)]
+    
+    items = {}
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request = {table.name: {"Keys": keys[start:start + BATCH_GET_MAX_KEYS]}}
+        attempt = 0
+        while request:
+            response = get_dynamodb().batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(table.name, []):
+                # Convert the features structure (data and metadata)
+                if "features" in item:
+                    item["features"] = dynamodb_to_dict(item["features"])
+                items[item["category"]] = item
+            
+            # Retry throttled keys with exponential backoff
+            request = response.get("UnprocessedKeys")
+            if request:
+                attempt += 1
+                if attempt > BATCH_GET_MAX_RETRIES:
+                    raise RuntimeError(f"BatchGetItem left unprocessed keys after {BATCH_GET_MAX_RETRIES} retries")
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+    
+    # Record metrics
+    tags = {"table_type": table_type}
+    with metrics.pipeline() as pipe:
+        pipe.increment_counter(f"{MetricNames.DYNAMODB_BATCH_GET_ITEM}.found", len(items), tags=tags)
+        pipe.increment_counter(f"{MetricNames.DYNAMODB_BATCH_GET_ITEM}.not_found", len(keys) - len(items), tags=tags)
+    
+    return items
+
+
+def _convert_item_features(item_data: dict) -> int:
+    """Convert item_data's features dict to DynamoDB format in place.
+    Returns the number of features under features["data"], counted before conversion."""
+    if "features" not in item_data:
+        return 0
+    features = item_data["features"]
+    feature_count = len(features.get("data", {})) if isinstance(features, dict) else 0
+    item_data["features"] = dict_to_dynamodb(features)
+    return feature_count
+
+
+def _record_put_metrics(pipe, item_data: dict, feature_count: int, table_type: str):
+    """Record put_item success and feature_count metrics for one written item"""
+    tags = {"category": item_data.get("category", "unknown"), "table_type": table_type}
+    pipe.increment_counter(f"{MetricNames.DYNAMODB_PUT_ITEM}.success", tags=tags)
+    pipe.gauge(f"{MetricNames.DYNAMODB_PUT_ITEM}.feature_count", feature_count, tags=tags)
+
+
 @time_function(MetricNames.DYNAMODB_PUT_ITEM)
 def put_item(item_data: dict, table_type: str = "bright_uid"):
     """Put a single item to DynamoDB. Converts features dict to DynamoDB format."""
-    table = TABLES.get(table_type)
+    table = get_table(table_type)
     if not table:
         raise ValueError(f"Invalid table_type: {table_type}. Must be 'bright_uid' or 'account_id'")
     
     # Convert features dict to DynamoDB format
-    if "features" in item_data:
-        item_data["features"] = dict_to_dynamodb(item_data["features"])
+    feature_count = _convert_item_features(item_data)
     
     response = table.put_item(Item=item_data)
     
     # Record metrics
-    category = item_data.get("category", "unknown")
-    features = item_data.get("features", {})
-    feature_count = len(features.get("data", {})) if isinstance(features, dict) else 0
-    metrics.increment_counter(f"{MetricNames.DYNAMODB_PUT_ITEM}.success", 
-                            tags={"category": category, "table_type": table_type})
-    metrics.gauge(f"{MetricNames.DYNAMODB_PUT_ITEM}.feature_count", 
-                 feature_count, tags={"category": category, "table_type": table_type})
+    with metrics.pipeline() as pipe:
+        _record_put_metrics(pipe, item_data, feature_count, table_type)
     
     return response
 
 
+@time_function(MetricNames.DYNAMODB_BATCH_WRITE_ITEM)
+def put_items(items: list, table_type: str = "bright_uid"):
+    """Put several items to DynamoDB using a batch writer (BatchWriteItem).
+    Converts each features dict to DynamoDB format. Unprocessed items are retried by boto3."""
+    table = get_table(table_type)
+    if not table:
+        raise ValueError(f"Invalid table_type: {table_type}. Must be 'bright_uid' or 'account_id'")
+    
+    feature_counts = []
+    with table.batch_writer() as batch:
+        for item_data in items:
+            # Convert features dict to DynamoDB format
+            feature_counts.append(_convert_item_features(item_data))
+            batch.put_item(Item=item_data)
+    
+    # Record per-category metrics, same names as put_item
+    with metrics.pipeline() as pipe:
+        for item_data, feature_count in zip(items, feature_counts):
+            _record_put_metrics(pipe, item_data, feature_count, table_type)
+
+
 @time_function(MetricNames.DYNAMODB_UPDATE_ITEM)
 def update_item_features(identifier: str, category: str, features: dict, table_type: str = "bright_uid"):
     """Update features for an existing item. Merges with existing features."""
-    table = TABLES.get(table_type)
+    table = get_table(table_type)
     if not table:
         raise ValueError(f"Invalid table_type: {table_type}. Must be 'bright_uid' or 'account_id'")
     
@@ -82,9 +160,10 @@ def update_item_features(identifier: str, category: str, features: dict, table_t
     
     # Record metrics
     feature_count = len(features)
-    metrics.increment_counter(f"{MetricNames.DYNAMODB_UPDATE_ITEM}.success", 
-                            tags={"category": category, "table_type": table_type})
-    metrics.gauge(f"{MetricNames.DYNAMODB_UPDATE_ITEM}.feature_count", 
-                 feature_count, tags={"category": category, "table_type": table_type})
+    with metrics.pipeline() as pipe:
+        pipe.increment_counter(f"{MetricNames.DYNAMODB_UPDATE_ITEM}.success", 
+                             tags={"category": category, "table_type": table_type})
+        pipe.gauge(f"{MetricNames.DYNAMODB_UPDATE_ITEM}.feature_count", 
+                  feature_count, tags={"category": category, "table_type": table_type})
     
     return item
@@ -1,6 +1,7 @@
 import os
 import time
 import functools
+from contextlib import contextmanager
 from typing import Optional
 from statsd import StatsClient
 
@@ -12,6 +13,15 @@ STATSD_PREFIX = os.getenv("STATSD_PREFIX", "feature_store")
 # Initialize StatsD client
 statsd_client = StatsClient(host=STATSD_HOST, port=STATSD_PORT, prefix=STATSD_PREFIX)
 
+# kwargs of decorated functions that are reported as metric tags
+TAGGED_KWARGS = ("identifier", "category", "table_type")
+
+def format_tags(tags: Optional[dict]) -> str:
+    """Format tags as a ",key=value,..." metric name suffix ("" when there are no tags)."""
+    if not tags:
+        return ""
+    return "," + ",".join([f"{k}={v}" for k, v in tags.items()])
+
 class MetricsCollector:
     """Centralized metrics collection for the feature store."""
     
@@ -20,68 +30,56 @@ class MetricsCollector:
     
     def increment_counter(self, metric_name: str, value: int = 1, tags: Optional[dict] = None):
         """Increment a counter metric."""
-        if tags:
-            # Format tags as key=value pairs
-            tag_str = ",".join([f"{k}={v}" for k, v in tags.items()])
-            metric_name = f"{metric_name},{tag_str}"
-        self.client.incr(metric_name, value)
+        self.client.incr(metric_name + format_tags(tags), value)
     
     def timing(self, metric_name: str, duration_ms: float, tags: Optional[dict] = None):
         """Record a timing metric in milliseconds."""
-        if tags:
-            tag_str = ",".join([f"{k}={v}" for k, v in tags.items()])
-            metric_name = f"{metric_name},{tag_str}"
-        self.client.timing(metric_name, duration_ms)
+        self.client.timing(metric_name + format_tags(tags), duration_ms)
     
     def gauge(self, metric_name: str, value: float, tags: Optional[dict] = None):
         """Set a gauge metric value."""
-        if tags:
-            tag_str = ",".join([f"{k}={v}" for k, v in tags.items()])
-            metric_name = f"{metric_name},{tag_str}"
-        self.client.gauge(metric_name, value)
+        self.client.gauge(metric_name + format_tags(tags), value)
+    
+    @contextmanager
+    def pipeline(self):
+        """Batch metrics recorded inside the block into as few UDP packets as possible."""
+        with self.client.pipeline() as pipe:
+            yield MetricsCollector(pipe)
 
 # Global metrics collector instance
 metrics = MetricsCollector(statsd_client)
 
 def time_function(metric_name: str):
     """Decorator to time function execution and record metrics."""
+    # Derived metric names are formatted once per decorated function
+    duration_metric = f"{metric_name}.duration"
+    success_metric = f"{metric_name}.success"
+    error_metric = f"{metric_name}.error"
+
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            status_metric = None
             start_time = time.time()
             try:
                 result = func(*args, **kwargs)
-                # Record success timing
-                duration_ms = (time.time() - start_time) * 1000
-                
-                # Extract relevant tags from kwargs if available
-                tags = {}
-                if "identifier" in kwargs:
-                    tags["identifier"] = kwargs["identifier"]
-                if "category" in kwargs:
-                    tags["category"] = kwargs["category"]
-                if "table_type" in kwargs:
-                    tags["table_type"] = kwargs["table_type"]
-                
-                metrics.timing(f"{metric_name}.duration", duration_ms, tags if tags else None)
-                metrics.increment_counter(f"{metric_name}.success", tags=tags if tags else None)
+                status_metric = success_metric
                 return result
-            except Exception as e:
-                # Record error timing and counter
-                duration_ms = (time.time() - start_time) * 1000
-                
-                # Extract relevant tags from kwargs if available
-                tags = {}
-                if "identifier" in kwargs:
-                    tags["identifier"] = kwargs["identifier"]
-                if "category" in kwargs:
-                    tags["category"] = kwargs["category"]
-                if "table_type" in kwargs:
-                    tags["table_type"] = kwargs["table_type"]
-                
-                metrics.timing(f"{metric_name}.duration", duration_ms, tags if tags else None)
-                metrics.increment_counter(f"{metric_name}.error", tags=tags if tags else None)
+            except Exception:
+                status_metric = error_metric
                 raise
+            finally:
+                # Only success and Exception are recorded: KeyboardInterrupt,
+                # SystemExit and GeneratorExit emit nothing
+                if status_metric is not None:
+                    duration_ms = (time.time() - start_time) * 1000
+                    
+                    # Extract relevant tags from kwargs once and format them a single time
+                    tag_suffix = format_tags({k: kwargs[k] for k in TAGGED_KWARGS if k in kwargs})
+                    
+                    with metrics.pipeline() as pipe:
+                        pipe.timing(duration_metric + tag_suffix, duration_ms)
+                        pipe.increment_counter(status_metric + tag_suffix)
         return wrapper
     return decorator
 
@@ -99,7 +97,9 @@ class MetricNames:
     
     # DynamoDB operations
     DYNAMODB_GET_ITEM = "dynamodb.get_item"
+    DYNAMODB_BATCH_GET_ITEM = "dynamodb.batch_get_item"
     DYNAMODB_PUT_ITEM = "dynamodb.put_item"
+    DYNAMODB_BATCH_WRITE_ITEM = "dynamodb.batch_write_item"
     DYNAMODB_UPDATE_ITEM = "dynamodb.update_item"
     
     # General
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query
 from app import crud
-from app.utils import filter_features
+from app.config import TABLE_TYPES
 from app.metrics import metrics, time_function, MetricNames
 from app.models import Item, Features, FeatureMetadata
 from typing import Dict, List, Optional
@@ -8,14 +8,19 @@ from datetime import datetime
 
 router = APIRouter()
 
+def validate_table_type(table_type: str):
+    """Reject table_type values other than 'bright_uid' or 'account_id'"""
+    if table_type not in TABLE_TYPES:
+        raise HTTPException(status_code=400, detail="table_type must be 'bright_uid' or 'account_id'")
+
 def create_features_with_metadata(data: Dict, source: str = "api", compute_id: str = None, ttl: int = None):
     """Helper to create features with metadata for NEW items"""
-    now = datetime.utcnow()
+    now = datetime.utcnow().isoformat()
     return {
         "data": data,
         "metadata": {
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "source": source,
             "compute_id": compute_id,
             "ttl": ttl
@@ -24,14 +29,14 @@ def create_features_with_metadata(data: Dict, source: str = "api", compute_id: s
 
 def update_features_with_metadata(data: Dict, existing_metadata: Dict, source: str = "api", compute_id: str = None, ttl: int = None):
     """Helper to update features with metadata for EXISTING items - preserves created_at"""
-    now = datetime.utcnow()
+    now = datetime.utcnow().isoformat()
     
     # Preserve original created_at, update updated_at
     return {
         "data": data,
         "metadata": {
-            "created_at": existing_metadata.get("created_at", now.isoformat()),
-            "updated_at": now.isoformat(),
+            "created_at": existing_metadata.get("created_at", now),
+            "updated_at": now,
             "source": source,
             "compute_id": compute_id,
             "ttl": ttl
@@ -54,8 +59,7 @@ def filter_features_new_schema(item: dict, feature_keys: set):
 @router.get("/get/item/{identifier}/{category}")
 @time_function(MetricNames.READ_SINGLE_ITEM)
 def get_category_features(identifier: str, category: str, table_type: str = Query(default="bright_uid", description="Table type: 'bright_uid' or 'account_id'")):
-    if table_type not in ["bright_uid", "account_id"]:
-        raise HTTPException(status_code=400, detail="table_type must be 'bright_uid' or 'account_id'")
+    validate_table_type(table_type)
     
     item = crud.get_item(identifier, category, table_type)
     if not item:
@@ -70,8 +74,7 @@ def get_category_features(identifier: str, category: str, table_type: str = Quer
 @router.post("/get/item/{identifier}")
 @time_function(MetricNames.READ_MULTI_CATEGORY)
 def get_items_by_feature_mapping(identifier: str, mapping: Dict[str, List[str]], table_type: str = Query(default="bright_uid", description="Table type: 'bright_uid' or 'account_id'")):
-    if table_type not in ["bright_uid", "account_id"]:
-        raise HTTPException(status_code=400, detail="table_type must be 'bright_uid' or 'account_id'")
+    validate_table_type(table_type)
     
     if not mapping:
         metrics.increment_counter(f"{MetricNames.READ_MULTI_CATEGORY}.error", tags={"error_type": "empty_mapping", "table_type": table_type})
@@ -80,8 +83,11 @@ def get_items_by_feature_mapping(identifier: str, mapping: Dict[str, List[str]],
     results: Dict[str, dict] = {}
     missing: List[str] = []
 
+    # Fetch all requested categories in batched round trips
+    found = crud.batch_get_items(identifier, list(mapping), table_type)
+    
     for category, features in mapping.items():
-        item = crud.get_item(identifier, category, table_type)
+        item = found.get(category)
         if not item:
             missing.append(category)
             continue
@@ -103,25 +109,26 @@ def get_items_by_feature_mapping(identifier: str, mapping: Dict[str, List[str]],
 @router.post("/items/{identifier}")
 @time_function(MetricNames.WRITE_MULTI_CATEGORY)
 def upsert_items(identifier: str, items: Dict[str, Dict], table_type: str = Query(default="bright_uid", description="Table type: 'bright_uid' or 'account_id'")):
-    if table_type not in ["bright_uid", "account_id"]:
-        raise HTTPException(status_code=400, detail="table_type must be 'bright_uid' or 'account_id'")
+    validate_table_type(table_type)
     
     if not items:
         metrics.increment_counter(f"{MetricNames.WRITE_MULTI_CATEGORY}.error", tags={"error_type": "empty_body", "table_type": table_type})
         raise HTTPException(status_code=400, detail="Body cannot be empty")
 
     results: Dict[str, dict] = {}
+    to_write: List[dict] = []
     total_features = 0
     
+    # Fetch existing items for all categories in batched round trips
+    existing_items = crud.batch_get_items(identifier, list(items), table_type)
+    
     for category, features in items.items():
-        if not isinstance(features, dict):
-            raise HTTPException(status_code=400, detail=f"Features for category '{category}' must be an object")
-        
         # Check if this is an update (item already exists)
-        existing_item = crud.get_item(identifier, category, table_type)
-        if existing_item and "features" in existing_item and "metadata" in existing_item["features"]:
+        existing_item = existing_items.get(category)
+        existing_features = existing_item.get("features") if existing_item else None
+        existing_metadata = existing_features.get("metadata") if existing_features else None
+        if existing_metadata is not None:
             # This is an update - preserve the original created_at
-            existing_metadata = existing_item["features"]["metadata"]
             features_obj = update_features_with_metadata(
                 features, 
                 existing_metadata, 
@@ -139,8 +146,10 @@ def upsert_items(identifier: str, items: Dict[str, Dict], table_type: str = Quer
             )
         
         total_features += len(features)
-        crud.put_item({table_type: identifier, "category": category, "features": features_obj}, table_type)
+        to_write.append({table_type: identifier, "category": category, "features": features_obj})
         results[category] = {"status": "replaced", "feature_count": len(features)}
 
+    crud.put_items(to_write, table_type)
+
     metrics.increment_counter(f"{MetricNames.WRITE_MULTI_CATEGORY}.success", tags={"identifier": identifier, "table_type": table_type, "categories_count": str(len(items))})
     return {"message": "Items written successfully (full replace per category)", "identifier": identifier, "table_type": table_type, "results": results, "total_features": total_features}
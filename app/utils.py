@@ -4,6 +4,9 @@ from decimal import Decimal
 deserializer = TypeDeserializer()
 serializer = TypeSerializer()
 
+# DynamoDB type descriptors handled by dynamodb_to_dict
+DYNAMODB_TYPE_KEYS = frozenset(("S", "N", "BOOL", "M", "L"))
+
 def dynamodb_to_dict(dynamo_item: dict) -> dict:
     """
     Convert a DynamoDB JSON-like dict into a standard Python dict.
@@ -13,10 +16,13 @@ def dynamodb_to_dict(dynamo_item: dict) -> dict:
         return dynamo_item
 
     result = {}
+    # Bind lookups once instead of per value
+    deserialize = deserializer.deserialize
+    type_keys = DYNAMODB_TYPE_KEYS
     for k, v in dynamo_item.items():
-        if isinstance(v, dict) and len(v) == 1 and list(v.keys())[0] in ["S", "N", "BOOL", "M", "L"]:
+        if isinstance(v, dict) and len(v) == 1 and next(iter(v)) in type_keys:
             # This is a DynamoDB-typed value → use deserializer
-            result[k] = deserializer.deserialize(v)
+            result[k] = deserialize(v)
         else:
             # Already a plain dict/Decimal → leave as is (or recurse)
             if isinstance(v, Decimal):
@@ -28,20 +34,6 @@ def dynamodb_to_dict(dynamo_item: dict) -> dict:
     return result
 
 
-def filter_features(item: dict, feature_keys: set[str]) -> dict:
-    """
-    Return a shallow copy of `item` where `features` map contains only the
-    requested keys. If a key does not exist, it is ignored.
-    """
-    if not feature_keys:
-        return item
-    filtered = dict(item)
-    features = filtered.get("features") or {}
-    if isinstance(features, dict):
-        filtered["features"] = {k: v for k, v in features.items() if k in feature_keys}
-    return filtered
-
-
 def dict_to_dynamodb(python_dict: dict) -> dict:
     """
     Convert a standard Python dict to DynamoDB format.
@@ -52,17 +44,41 @@ def dict_to_dynamodb(python_dict: dict) -> dict:
     
     result = {}
     for k, v in python_dict.items():
-        if isinstance(v, dict):
+        # Exact type checks first (no MRO walk); bool must precede int
+        t = type(v)
+        if t is str:
+            result[k] = {"S": v}
+        elif t is dict:
+            result[k] = {"M": dict_to_dynamodb(v)}
+        elif t is bool:
+            result[k] = {"BOOL": v}
+        elif t is int or t is float:
+            result[k] = {"N": str(v)}
+        elif t is list:
+            result[k] = {"L": [_list_item_to_dynamodb(item) for item in v]}
+        # Subclasses of the builtin types fall through to isinstance
+        elif isinstance(v, dict):
             result[k] = {"M": dict_to_dynamodb(v)}
         elif isinstance(v, str):
             result[k] = {"S": v}
-        elif isinstance(v, (int, float)):
-            result[k] = {"N": str(v)}
         elif isinstance(v, bool):
             result[k] = {"BOOL": v}
+        elif isinstance(v, (int, float)):
+            result[k] = {"N": str(v)}
         elif isinstance(v, list):
-            result[k] = {"L": [{"S": str(item)} if isinstance(item, str) else {"N": str(item)} if isinstance(item, (int, float)) else {"BOOL": item} if isinstance(item, bool) else {"S": str(item)} for item in v]}
+            result[k] = {"L": [_list_item_to_dynamodb(item) for item in v]}
         else:
             result[k] = {"S": str(v)}
     return result
 
+
+def _list_item_to_dynamodb(item) -> dict:
+    """Convert a single list element to DynamoDB format (scalars only)."""
+    t = type(item)
+    if t is str:
+        return {"S": item}
+    if t is bool:
+        return {"BOOL": item}
+    if t is int or t is float:
+        return {"N": str(item)}
+    return {"S": str(item)}
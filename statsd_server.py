@@ -1,132 +1,310 @@
 #!/usr/bin/env python3
 """
 Simple StatsD server for development and testing.
-Receives metrics and prints them to console with timestamps.
+Receives metrics, aggregates them in memory and prints them to console
+on a fixed flush interval.
 """
 
+import argparse
+import functools
+import math
+import os
+import sys
+import select
+import signal
 import socket
 import threading
 import time
 from datetime import datetime
 import re
 
+# Kernel receive buffer requested for the UDP socket (absorbs bursts)
+RECV_BUFFER_BYTES = 12 * 1024 * 1024
+
+# Largest UDP payload, so coalesced or multi-metric datagrams are never truncated
+MAX_DATAGRAM_SIZE = 65535
+
+# Smallest SO_RCVBUF retried before leaving the OS default in place
+MIN_RECV_BUFFER_BYTES = 64 * 1024
+
+# Max datagrams read per wakeup before returning to the flush check
+MAX_DRAIN_BATCH = 32
+
+# metric.name:value|type[|@sample_rate][|#tag1:value1,tag2:value2], with the
+# optional @ and # segments accepted in either order. The rate allows exponent
+# syntax since Python clients send str(rate), e.g. @1e-05.
+# Multiline so one finditer() pass walks every line of a datagram; any other
+# non-blank line matches the last group so it can be counted as a parse failure
+_RATE = rb'([0-9.]+(?:[eE][-+]?[0-9]+)?)'
+_METRIC_RE = re.compile(
+    rb'^[ \t\r]*(?:'
+    rb'([^:\s]+):([^|\s]+)\|([^|\s]+)'
+    rb'(?:\|@' + _RATE + rb'(?:\|#([^|\r\n]*?))?'
+    rb'|\|#([^|\r\n]*?)(?:\|@' + _RATE + rb')?)?'
+    rb'|(\S[^\r\n]*?))[ \t\r]*$',
+    re.M
+)
+
+_NO_TAGS = frozenset()
+
+# Metric names repeat constantly; decode each distinct name once and intern it so
+# aggregation-key comparisons short-circuit on identity
+@functools.lru_cache(maxsize=8192)
+def _intern_name(raw):
+    """Decode a raw metric name to an interned str"""
+    return sys.intern(raw.decode('utf-8', 'replace'))
+
+# Senders repeat the same tag sets on every packet, so parsed sets are cached
+@functools.lru_cache(maxsize=8192)
+def _parse_tags(tag_str):
+    """Parse a raw tag segment into a frozenset of (key, value) pairs"""
+    pairs = []
+    for tag in tag_str.split(b','):
+        key, sep, tag_value = tag.partition(b':')
+        if sep:
+            pairs.append((key, tag_value))
+    return frozenset(pairs)
+
+class TimerStats:
+    """Running count/sum/min/max of timer values, updated in O(1) per sample"""
+    __slots__ = ('count', 'sum', 'min', 'max')
+    
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    @property
+    def avg(self):
+        return self.sum / self.count if self.count else 0.0
+
+def _decode(raw):
+    """Decode raw metric bytes for display"""
+    return raw.decode('utf-8', 'replace')
+
+def _format_key(key):
+    """Render a (name, tags) aggregation key for display"""
+    name, tags = key
+    if not tags:
+        return name
+    return name + " | " + ", ".join([f"{_decode(k)}={_decode(v)}" for k, v in sorted(tags)])
+
 class SimpleStatsDServer:
-    def __init__(self, host='localhost', port=8125):
+    def __init__(self, host='localhost', port=8125, flush_interval=10.0, trace=None, reuse_port=False):
         self.host = host
         self.port = port
+        self.flush_interval = flush_interval
+        # Per-metric console output is opt-in (STATSD_TRACE=1): it serializes the receive loop on stdout
+        self.trace = os.environ.get('STATSD_TRACE') == '1' if trace is None else trace
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._request_recv_buffer()
+        if reuse_port:
+            # Let several worker processes bind the same port; the kernel spreads datagrams across them
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.sock.bind((host, port))
+        # Linux caps the request at net.core.rmem_max and reports double the granted
+        # size (bookkeeping overhead), so halve it to compare with what was requested
+        self.recv_buffer_bytes = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        if sys.platform.startswith('linux'):
+            self.recv_buffer_bytes //= 2
+        # Non-blocking so queued datagrams can be drained without a syscall wait;
+        # start() blocks in select() instead
+        self.sock.setblocking(False)
         self.running = True
         
-        # Metrics storage
+        # Reusable receive buffer, so reads do not allocate a bytes object per datagram
+        self._rxbuf = bytearray(MAX_DATAGRAM_SIZE)
+        self._rxview = memoryview(self._rxbuf)
+        
+        # Metrics storage (totals since start), keyed by (interned name, frozenset of raw tag pairs)
         self.metrics = {
             'counters': {},
             'gauges': {},
             'timers': {}
         }
+        # Metrics aggregated since the last flush
+        self._window = self._new_window()
+        
+        # Receive loop counters: eagain staying at zero under load means the drain
+        # batch is always full (parse-bound); frequent eagain means the loop keeps up
+        self._stats = {'packets': 0, 'parse_fail': 0, 'batch_max': 0, 'eagain': 0}
+        
+        # Metric type -> aggregation handler
+        self._handlers = {
+            b'c': self._handle_counter,
+            b'g': self._handle_gauge,
+            b'ms': self._handle_timer,
+            b'h': self._handle_timer
+        }
+    
+    def _request_recv_buffer(self):
+        """Request RECV_BUFFER_BYTES of SO_RCVBUF, halving the size while the kernel refuses it"""
+        # Linux silently caps the request at net.core.rmem_max, but macOS/BSD fail with
+        # ENOBUFS above kern.ipc.maxsockbuf; below MIN_RECV_BUFFER_BYTES keep the default
+        size = RECV_BUFFER_BYTES
+        while size >= MIN_RECV_BUFFER_BYTES:
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+                return
+            except OSError:
+                size //= 2
+    
+    @staticmethod
+    def _new_window():
+        return {'counters': {}, 'gauges': {}, 'timers': {}}
+        
+    def parse_metrics(self, data):
+        """Parse every line of a raw datagram (bytes or memoryview) in the format
+        metric.name:value|type|@sample_rate|#tag1:value1,tag2:value2.
+        Yields a metric dict per non-blank line, or None for a line that does not parse"""
+        # re accepts a memoryview and returns the groups as bytes, so the
+        # payload is never copied or decoded as a whole
+        for m in _METRIC_RE.finditer(data):
+            yield self._metric_from_match(m)
+    
+    def _metric_from_match(self, m):
+        """Build a metric dict from a _METRIC_RE match, or None for an unparseable line"""
+        metric_name, value, metric_type, sample_rate, tag_str, tag_str_first, sample_rate_last, invalid = m.groups()
+        if invalid is not None:
+            if self.trace:
+                print(f"Error parsing metric: {_decode(invalid)}")
+            return None
         
-    def parse_metric(self, data):
-        """Parse StatsD metric format: metric.name:value|type|@sample_rate|#tag1:value1,tag2:value2"""
         try:
-            # Split by | to get metric, type, sample_rate, tags
-            parts = data.split('|')
-            if len(parts) < 2:
-                return None
-                
-            metric_part = parts[0]
-            metric_type = parts[1]
-            
-            # Extract sample rate and tags
-            sample_rate = 1.0
-            tags = {}
+            sample_rate = sample_rate or sample_rate_last
+            sample_rate = float(sample_rate) if sample_rate else 1.0
+            # process_metric divides by the rate
+            if sample_rate <= 0:
+                raise ValueError(f"invalid sample rate {sample_rate}")
+            tag_str = tag_str or tag_str_first
             
-            for part in parts[2:]:
-                if part.startswith('@'):
-                    sample_rate = float(part[1:])
-                elif part.startswith('#'):
-                    tag_str = part[1:]
-                    for tag in tag_str.split(','):
-                        if ':' in tag:
-                            key, value = tag.split(':', 1)
-                            tags[key] = value
-            
-            # Parse metric name and value
-            if ':' not in metric_part:
-                return None
-                
-            metric_name, value = metric_part.split(':', 1)
-            value = float(value)
+            # Tags are only parsed when the packet carries them
+            tags = _parse_tags(tag_str) if tag_str else _NO_TAGS
             
             return {
-                'name': metric_name,
-                'value': value,
+                'name': _intern_name(metric_name),
+                # Counters are almost always plain integers: skip the float parser for them
+                'value': int(value) if value.isdigit() else float(value),
                 'type': metric_type,
                 'sample_rate': sample_rate,
-                'tags': tags,
-                'timestamp': datetime.now()
+                'tags': tags
             }
         except Exception as e:
-            print(f"Error parsing metric: {data} - {e}")
+            # Failures are counted in the receive stats; details only when tracing
+            if self.trace:
+                print(f"Error parsing metric: {_decode(m.group(0))} - {e}")
             return None
     
     def process_metric(self, metric):
-        """Process and store the metric"""
+        """Aggregate the metric into the current flush window"""
         if not metric:
             return
             
-        name = metric['name']
+        key = (metric['name'], metric['tags'])
         value = metric['value']
         metric_type = metric['type']
-        tags = metric['tags']
         
         # Apply sample rate
         if metric['sample_rate'] < 1.0:
             value = value / metric['sample_rate']
         
-        # Create tag string for display
-        tag_str = ""
-        if tags:
-            tag_str = " | " + ", ".join([f"{k}={v}" for k, v in tags.items()])
-        
-        # Store and display based on type
-        if metric_type == 'c':  # Counter
-            if name not in self.metrics['counters']:
-                self.metrics['counters'][name] = 0
-            self.metrics['counters'][name] += value
-            print(f"📊 COUNTER: {name} += {value} (total: {self.metrics['counters'][name]}){tag_str}")
-            
-        elif metric_type == 'g':  # Gauge
-            self.metrics['gauges'][name] = value
-            print(f"📈 GAUGE: {name} = {value}{tag_str}")
-            
-        elif metric_type == 'ms':  # Timer
-            if name not in self.metrics['timers']:
-                self.metrics['timers'][name] = []
-            self.metrics['timers'][name].append(value)
-            print(f"⏱️  TIMER: {name} = {value}ms{tag_str}")
-            
-        elif metric_type == 'h':  # Histogram
-            if name not in self.metrics['timers']:
-                self.metrics['timers'][name] = []
-            self.metrics['timers'][name].append(value)
-            print(f"📊 HISTOGRAM: {name} = {value}{tag_str}")
+        if self.trace:
+            print(f"🔎 {_decode(metric_type)}: {_format_key(key)} = {value}")
+        
+        handler = self._handlers.get(metric_type)
+        if handler is not None:
+            handler(key, value)
+    
+    def _handle_counter(self, key, value):
+        counters = self._window['counters']
+        counters[key] = counters.get(key, 0) + value
+    
+    def _handle_gauge(self, key, value):
+        self._window['gauges'][key] = value
+    
+    def _handle_timer(self, key, value):
+        # Timers and histograms share running stats
+        timers = self._window['timers']
+        stats = timers.get(key)
+        if stats is None:
+            stats = timers[key] = TimerStats()
+        stats.add(value)
+    
+    def flush(self):
+        """Merge the current window into the totals and print it"""
+        window, self._window = self._window, self._new_window()
+        if not any(window.values()):
+            return
+        
+        print(f"🕒 FLUSH {datetime.now().strftime('%H:%M:%S')}")
+        for key, value in window['counters'].items():
+            total = self.metrics['counters'].get(key, 0) + value
+            self.metrics['counters'][key] = total
+            print(f"📊 COUNTER: {_format_key(key)} += {value} (total: {total})")
+        
+        for key, value in window['gauges'].items():
+            self.metrics['gauges'][key] = value
+            print(f"📈 GAUGE: {_format_key(key)} = {value}")
+        
+        for key, stats in window['timers'].items():
+            if key not in self.metrics['timers']:
+                self.metrics['timers'][key] = TimerStats()
+            self.metrics['timers'][key].merge(stats)
+            print(f"⏱️  TIMER: {_format_key(key)} avg={stats.avg:.2f}, min={stats.min:.2f}, max={stats.max:.2f} (count: {stats.count})")
+    
+    def _drain(self):
+        """Read up to MAX_DRAIN_BATCH queued datagrams without blocking"""
+        stats = self._stats
+        batch = 0
+        for _ in range(MAX_DRAIN_BATCH):
+            try:
+                nbytes = self.sock.recv_into(self._rxbuf)
+            except BlockingIOError:
+                # Socket queue emptied before the batch cap
+                stats['eagain'] += 1
+                break
+            batch += 1
+            # Parse every line straight out of the receive buffer
+            for metric in self.parse_metrics(self._rxview[:nbytes]):
+                if metric is None:
+                    stats['parse_fail'] += 1
+                self.process_metric(metric)
+        
+        stats['packets'] += batch
+        if batch > stats['batch_max']:
+            stats['batch_max'] = batch
     
     def start(self):
         """Start the StatsD server"""
         print(f"🚀 Starting StatsD server on {self.host}:{self.port}")
-        print("📡 Listening for metrics... (Press Ctrl+C to stop)")
+        print(f"📡 Listening for metrics, flushing every {self.flush_interval}s... (Press Ctrl+C to stop)")
+        if self.recv_buffer_bytes < RECV_BUFFER_BYTES:
+            print(f"⚠️  SO_RCVBUF capped at {self.recv_buffer_bytes} bytes (raise net.core.rmem_max or kern.ipc.maxsockbuf to avoid drops)")
         print("=" * 80)
         
+        next_flush = time.monotonic() + self.flush_interval
         while self.running:
             try:
-                data, addr = self.sock.recvfrom(1024)
-                message = data.decode('utf-8').strip()
-                
-                # Handle multiple metrics in one packet
-                for line in message.split('\n'):
-                    if line.strip():
-                        metric = self.parse_metric(line.strip())
-                        self.process_metric(metric)
+                # Wait until data arrives or the next flush is due
+                timeout = max(next_flush - time.monotonic(), 0)
+                readable, _, _ = select.select([self.sock], [], [], timeout)
+                if readable:
+                    self._drain()
                         
             except KeyboardInterrupt:
                 print("\n🛑 Shutting down StatsD server...")
@@ -134,37 +312,81 @@ class SimpleStatsDServer:
                 break
             except Exception as e:
                 print(f"❌ Error receiving data: {e}")
+            
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
                 
         self.sock.close()
     
     def print_summary(self):
         """Print a summary of collected metrics"""
+        self.flush()
         print("\n" + "=" * 80)
         print("📊 METRICS SUMMARY")
         print("=" * 80)
         
+        stats = self._stats
+        print(f"\n📡 RECEIVE: packets={stats['packets']}, parse_fail={stats['parse_fail']}, "
+              f"batch_max={stats['batch_max']}, eagain={stats['eagain']}, "
+              f"rcvbuf={self.recv_buffer_bytes}")
+        
         if self.metrics['counters']:
             print("\n🔢 COUNTERS:")
-            for name, value in self.metrics['counters'].items():
-                print(f"  {name}: {value}")
+            for key, value in self.metrics['counters'].items():
+                print(f"  {_format_key(key)}: {value}")
         
         if self.metrics['gauges']:
             print("\n📈 GAUGES:")
-            for name, value in self.metrics['gauges'].items():
-                print(f"  {name}: {value}")
+            for key, value in self.metrics['gauges'].items():
+                print(f"  {_format_key(key)}: {value}")
         
         if self.metrics['timers']:
             print("\n⏱️  TIMERS (avg/min/max):")
-            for name, values in self.metrics['timers'].items():
-                if values:
-                    avg = sum(values) / len(values)
-                    min_val = min(values)
-                    max_val = max(values)
-                    print(f"  {name}: avg={avg:.2f}ms, min={min_val:.2f}ms, max={max_val:.2f}ms (count: {len(values)})")
+            for key, stats in self.metrics['timers'].items():
+                print(f"  {_format_key(key)}: avg={stats.avg:.2f}ms, min={stats.min:.2f}ms, max={stats.max:.2f}ms (count: {stats.count})")
 
 if __name__ == "__main__":
-    server = SimpleStatsDServer()
+    parser = argparse.ArgumentParser(description="Simple StatsD server for development and testing")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8125)
+    parser.add_argument("--flush-interval", type=float, default=10.0,
+                        help="seconds between aggregated console flushes")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes sharing the port via SO_REUSEPORT (each keeps its own totals)")
+    args = parser.parse_args()
+    
+    # Fork before creating sockets so every worker binds its own; only the
+    # parent keeps the worker pids
+    children = []
+    for _ in range(args.workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            children = []
+            break
+        children.append(pid)
+    
+    def stop(signum, frame):
+        """Forward SIGINT/SIGTERM to the workers once, then stop this process's loop"""
+        # Ctrl+C already reaches the whole process group: ignore the forwarded repeat
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    
+    server = SimpleStatsDServer(host=args.host, port=args.port, flush_interval=args.flush_interval,
+                                reuse_port=args.workers > 1)
     try:
         server.start()
     finally:
         server.print_summary()
+        # Reap the workers so none outlives the parent holding the port
+        for pid in children:
+            os.waitpid(pid, 0)
@@ -0,0 +1,14 @@
+from unittest import mock
+
+import pytest
+
+from app import crud
+
+
+@pytest.fixture
+def table():
+    """Stub DynamoDB table returned by crud.get_table for every table_type"""
+    table = mock.MagicMock()
+    table.name = "features_test"
+    with mock.patch.object(crud, "get_table", return_value=table):
+        yield table
@@ -0,0 +1,141 @@
+from unittest import mock
+
+import pytest
+
+from app import crud
+
+def stored_item(category: str):
+    """An item as BatchGetItem returns it from the resource API"""
+    return {
+        "bright_uid": "user123",
+        "category": category,
+        "features": {"data": {"M": {"f1": {"N": "1"}}}},
+    }
+
+
+class FakeDynamoDB:
+    """Stub resource answering batch_get_item from a set of existing categories.
+    unprocessed(call_index, keys) returns the keys to report back as UnprocessedKeys."""
+
+    def __init__(self, existing, unprocessed=None):
+        self.existing = set(existing)
+        self.unprocessed = unprocessed or (lambda call_index, keys: [])
+        self.requests = []
+
+    def batch_get_item(self, RequestItems):
+        (table_name, request), = RequestItems.items()
+        keys = request["Keys"]
+        self.requests.append(keys)
+        unprocessed = self.unprocessed(len(self.requests) - 1, keys)
+        served = [key for key in keys if key not in unprocessed]
+        response = {
+            "Responses": {table_name: [stored_item(key["category"]) for key in served if key["category"] in self.existing]}
+        }
+        if unprocessed:
+            response["UnprocessedKeys"] = {table_name: {"Keys": unprocessed}}
+        return response
+
+
+@pytest.fixture
+def sleep():
+    with mock.patch.object(crud.time, "sleep") as sleep:
+        yield sleep
+
+
+def use_dynamodb(fake: FakeDynamoDB):
+    return mock.patch.object(crud, "get_dynamodb", return_value=fake)
+
+
+def test_batch_get_items_chunks_requests_at_100_keys(table):
+    categories = [f"cat{i}" for i in range(250)]
+    fake = FakeDynamoDB(existing=categories)
+
+    with use_dynamodb(fake):
+        items = crud.batch_get_items("user123", categories, "bright_uid")
+
+    assert [len(keys) for keys in fake.requests] == [100, 100, 50]
+    assert set(items) == set(categories)
+    assert items["cat0"]["features"] == {"data": {"f1": 1}}
+
+
+def test_batch_get_items_drops_duplicate_categories(table):
+    fake = FakeDynamoDB(existing=["a", "b"])
+
+    with use_dynamodb(fake):
+        items = crud.batch_get_items("user123", ["a", "b", "a", "b", "a"], "bright_uid")
+
+    assert fake.requests == [[
+        {"bright_uid": "user123", "category": "a"},
+        {"bright_uid": "user123", "category": "b"},
+    ]]
+    assert set(items) == {"a", "b"}
+
+
+def test_batch_get_items_omits_missing_categories(table):
+    fake = FakeDynamoDB(existing=["a"])
+
+    with use_dynamodb(fake):
+        items = crud.batch_get_items("user123", ["a", "missing"], "account_id")
+
+    assert set(items) == {"a"}
+    assert fake.requests[0][1] == {"account_id": "user123", "category": "missing"}
+
+
+def test_batch_get_items_retries_unprocessed_keys(table, sleep):
+    categories = [f"cat{i}" for i in range(10)]
+    # First call leaves the second half unprocessed; the retry serves everything
+    fake = FakeDynamoDB(existing=categories, unprocessed=lambda call_index, keys: keys[5:] if call_index == 0 else [])
+
+    with use_dynamodb(fake):
+        items = crud.batch_get_items("user123", categories, "bright_uid")
+
+    assert [len(keys) for keys in fake.requests] == [10, 5]
+    assert fake.requests[1] == [{"bright_uid": "user123", "category": f"cat{i}"} for i in range(5, 10)]
+    assert set(items) == set(categories)
+    sleep.assert_called_once()
+
+
+def test_batch_get_items_raises_when_retries_are_exhausted(table, sleep):
+    fake = FakeDynamoDB(existing=["a", "b"], unprocessed=lambda call_index, keys: keys[-1:])
+
+    with use_dynamodb(fake), pytest.raises(RuntimeError):
+        crud.batch_get_items("user123", ["a", "b"], "bright_uid")
+
+    assert len(fake.requests) == crud.BATCH_GET_MAX_RETRIES + 1
+    assert sleep.call_count == crud.BATCH_GET_MAX_RETRIES
+
+
+def test_batch_get_items_rejects_unknown_table_type():
+    with mock.patch.object(crud, "get_table", return_value=None), pytest.raises(ValueError):
+        crud.batch_get_items("user123", ["a"], "email")
+
+
+@pytest.fixture
+def pipe():
+    with mock.patch.object(crud.metrics, "pipeline") as pipeline:
+        yield pipeline.return_value.__enter__.return_value
+
+
+def feature_counts(pipe):
+    return {call.kwargs["tags"]["category"]: call.args[1] for call in pipe.gauge.call_args_list
+            if call.args[0] == "dynamodb.put_item.feature_count"}
+
+
+def test_put_items_reports_feature_count_before_conversion(table, pipe):
+    crud.put_items([
+        {"bright_uid": "user123", "category": "a", "features": {"data": {"f1": 1, "f2": 2, "f3": 3}, "metadata": {}}},
+        {"bright_uid": "user123", "category": "b", "features": {"data": {}, "metadata": {}}},
+    ])
+
+    assert feature_counts(pipe) == {"a": 3, "b": 0}
+    batch = table.batch_writer.return_value.__enter__.return_value
+    assert batch.put_item.call_args_list[0].kwargs["Item"]["features"]["data"] == {
+        "M": {"f1": {"N": "1"}, "f2": {"N": "2"}, "f3": {"N": "3"}}
+    }
+
+
+def test_put_item_reports_feature_count_before_conversion(table, pipe):
+    crud.put_item({"bright_uid": "user123", "category": "a", "features": {"data": {"f1": 1, "f2": 2}, "metadata": {}}})
+
+    assert feature_counts(pipe) == {"a": 2}
+    table.put_item.assert_called_once()
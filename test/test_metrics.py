@@ -0,0 +1,47 @@
+from unittest import mock
+
+import pytest
+
+from app import metrics as metrics_module
+from app.metrics import time_function
+
+
+@pytest.fixture
+def pipe():
+    with mock.patch.object(metrics_module.metrics, "pipeline") as pipeline:
+        yield pipeline.return_value.__enter__.return_value
+
+
+def test_time_function_records_success_with_tags(pipe):
+    @time_function("op")
+    def op(identifier, table_type):
+        return "ok"
+
+    assert op(identifier="u1", table_type="bright_uid") == "ok"
+
+    assert pipe.timing.call_args.args[0] == "op.duration,identifier=u1,table_type=bright_uid"
+    pipe.increment_counter.assert_called_once_with("op.success,identifier=u1,table_type=bright_uid")
+
+
+def test_time_function_records_error_for_exceptions(pipe):
+    @time_function("op")
+    def op():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        op()
+
+    assert pipe.timing.call_args.args[0] == "op.duration"
+    pipe.increment_counter.assert_called_once_with("op.error")
+
+
+def test_time_function_ignores_base_exceptions(pipe):
+    @time_function("op")
+    def op():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        op()
+
+    pipe.timing.assert_not_called()
+    pipe.increment_counter.assert_not_called()
@@ -0,0 +1,82 @@
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.main import app
+
+CREATED_AT = "2024-01-01T00:00:00"
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def dynamodb(table):
+    """Stub resource whose BatchGetItem finds one existing category"""
+    dynamodb = mock.MagicMock()
+    # As BatchGetItem returns it from the resource API
+    dynamodb.batch_get_item.return_value = {"Responses": {table.name: [{
+        "bright_uid": "user123",
+        "category": "existing",
+        "features": {
+            "data": {"M": {"old": {"N": "1"}}},
+            "metadata": {"M": {
+                "created_at": {"S": CREATED_AT},
+                "updated_at": {"S": CREATED_AT},
+                "source": {"S": "api"},
+            }},
+        },
+    }]}}
+    with mock.patch.object(crud, "get_dynamodb", return_value=dynamodb):
+        yield dynamodb
+
+
+def written_items(table):
+    batch = table.batch_writer.return_value.__enter__.return_value
+    return {call.kwargs["Item"]["category"]: call.kwargs["Item"] for call in batch.put_item.call_args_list}
+
+
+def metadata(item):
+    return {k: v.get("S") for k, v in item["features"]["metadata"]["M"].items()}
+
+
+def test_upsert_items_writes_all_categories_through_one_batch_writer(table):
+    response = client.post("/items/user123", json={"existing": {"f1": 1}, "new": {"f2": "x", "f3": True}})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"] == {
+        "existing": {"status": "replaced", "feature_count": 1},
+        "new": {"status": "replaced", "feature_count": 2},
+    }
+    assert body["total_features"] == 3
+    table.batch_writer.assert_called_once()
+    table.put_item.assert_not_called()
+    assert set(written_items(table)) == {"existing", "new"}
+
+
+def test_upsert_items_preserves_created_at_for_existing_category(table):
+    client.post("/items/user123", json={"existing": {"f1": 1}})
+
+    item = written_items(table)["existing"]
+    assert item["bright_uid"] == "user123"
+    assert item["features"]["data"] == {"M": {"f1": {"N": "1"}}}
+    assert metadata(item)["created_at"] == CREATED_AT
+    assert metadata(item)["updated_at"] != CREATED_AT
+
+
+def test_upsert_items_creates_fresh_metadata_for_new_category(table):
+    client.post("/items/user123", json={"new": {"f2": "x"}})
+
+    meta = metadata(written_items(table)["new"])
+    assert meta["created_at"] == meta["updated_at"]
+    assert meta["created_at"] != CREATED_AT
+    assert meta["source"] == "api"
+
+
+def test_upsert_items_rejects_invalid_table_type(table):
+    response = client.post("/items/user123?table_type=email", json={"new": {"f2": "x"}})
+
+    assert response.status_code == 400
+    table.batch_writer.assert_not_called()
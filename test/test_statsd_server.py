@@ -0,0 +1,129 @@
+import errno
+import select
+import socket
+from unittest import mock
+
+import pytest
+
+import statsd_server
+from statsd_server import SimpleStatsDServer, TimerStats, _METRIC_RE
+
+
+@pytest.fixture
+def server():
+    server = SimpleStatsDServer(host="127.0.0.1", port=0, trace=False)
+    yield server
+    server.sock.close()
+
+
+def parse(server, data):
+    return list(server.parse_metrics(data))
+
+
+def send_and_drain(server, *datagrams):
+    """Deliver datagrams to the server's socket and run one drain pass"""
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for datagram in datagrams:
+            sender.sendto(datagram, server.sock.getsockname())
+    finally:
+        sender.close()
+    select.select([server.sock], [], [], 1.0)
+    server._drain()
+
+
+@pytest.mark.parametrize("line", [b"api.hits:1|c|@0.5|#env:prod,az:a", b"api.hits:1|c|#env:prod,az:a|@0.5"])
+def test_parse_accepts_rate_and_tags_in_either_order(server, line):
+    [metric] = parse(server, line)
+
+    assert metric["name"] == "api.hits"
+    assert metric["type"] == b"c"
+    assert metric["sample_rate"] == 0.5
+    assert metric["tags"] == frozenset({(b"env", b"prod"), (b"az", b"a")})
+
+
+def test_parse_accepts_exponent_sample_rate(server):
+    [metric] = parse(server, b"lat:3|ms|@1e-05")
+
+    assert metric["sample_rate"] == 1e-05
+
+
+@pytest.mark.parametrize("line", [b"a:1|c|@0", b"a:1|c|#k:v|@0.1|#x:y", b"a:1|c|foo", b"no-separators", b"a b:1|c"])
+def test_parse_rejects_invalid_lines(server, line):
+    assert parse(server, line) == [None]
+
+
+def test_parse_skips_blank_lines_and_surrounding_whitespace(server):
+    metrics = parse(server, b"\n  a:1|c  \r\n\r\n\t\nb:2|g|#k:v\r\n")
+
+    assert [(m["name"], m["value"], m["tags"]) for m in metrics] == [
+        ("a", 1, frozenset()),
+        ("b", 2, frozenset({(b"k", b"v")})),
+    ]
+
+
+def test_parse_values_as_int_or_float(server):
+    counter, timer, gauge = parse(server, b"a:12|c\nb:1.5|ms\nc:-3|g")
+
+    assert counter["value"] == 12 and type(counter["value"]) is int
+    assert timer["value"] == 1.5
+    assert gauge["value"] == -3.0 and type(gauge["value"]) is float
+
+
+def test_match_groups_from_memoryview_are_hashable_bytes(server):
+    view = memoryview(bytearray(b"a:1|c|#k:v"))
+
+    m = _METRIC_RE.search(view)
+    assert all(type(group) is bytes for group in m.groups() if group is not None)
+    [metric] = parse(server, view)
+    assert {metric["tags"]: 1}[frozenset({(b"k", b"v")})] == 1
+
+
+def test_drain_counts_invalid_lines_and_keeps_the_rest_of_the_datagram(server):
+    send_and_drain(server, b"zz:1|c|@0\nbad line\nok:2|c\r\nlat:4|ms", b"ok:3|c")
+
+    assert server._stats["packets"] == 2
+    assert server._stats["parse_fail"] == 2
+    assert server._window["counters"] == {("ok", frozenset()): 5}
+    assert server._window["timers"][("lat", frozenset())].count == 1
+
+
+def test_timer_stats_merge():
+    window, total = TimerStats(), TimerStats()
+    for value in (5, 15):
+        window.add(value)
+    total.add(1)
+
+    total.merge(window)
+    total.merge(TimerStats())
+
+    assert (total.count, total.sum, total.min, total.max) == (3, 21, 1, 15)
+    assert total.avg == 7
+    assert TimerStats().avg == 0.0
+
+
+def test_recv_buffer_request_halves_until_the_kernel_accepts_it(server):
+    # macOS/BSD refuse sizes above kern.ipc.maxsockbuf instead of capping them
+    limit = 7 * 1024 * 1024
+    accepted = []
+
+    def setsockopt(level, option, size):
+        if size > limit:
+            raise OSError(errno.ENOBUFS, "No buffer space available")
+        accepted.append(size)
+
+    with mock.patch.object(server, "sock") as sock:
+        sock.setsockopt.side_effect = setsockopt
+        server._request_recv_buffer()
+
+    assert accepted == [statsd_server.RECV_BUFFER_BYTES // 2]
+
+
+def test_recv_buffer_request_keeps_the_default_when_every_size_fails(server):
+    with mock.patch.object(server, "sock") as sock:
+        sock.setsockopt.side_effect = OSError(errno.ENOBUFS, "No buffer space available")
+        server._request_recv_buffer()
+
+    sizes = [call.args[2] for call in sock.setsockopt.call_args_list]
+    assert sizes[0] == statsd_server.RECV_BUFFER_BYTES
+    assert sizes[-1] >= statsd_server.MIN_RECV_BUFFER_BYTES
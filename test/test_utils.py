@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from app.utils import dict_to_dynamodb, dynamodb_to_dict
+
+
+def test_dict_to_dynamodb_stores_bools_as_bool():
+    assert dict_to_dynamodb({"flag": True, "flags": [False, 1]}) == {
+        "flag": {"BOOL": True},
+        "flags": {"L": [{"BOOL": False}, {"N": "1"}]},
+    }
+
+
+def test_dynamodb_round_trip():
+    data = {
+        "flag": True,
+        "off": False,
+        "count": 7,
+        "ratio": 0.25,
+        "name": "abc",
+        "nested": {"inner": {"enabled": False, "n": 3}},
+        "mixed": ["x", 2, 1.5, True],
+    }
+
+    result = dynamodb_to_dict(dict_to_dynamodb(data))
+
+    assert result == data
+    # bool == 1 would hide a numeric round trip, so check the types too
+    assert result["flag"] is True and result["off"] is False
+    assert result["nested"]["inner"]["enabled"] is False
+    assert result["mixed"][3] is True
+    assert isinstance(result["count"], Decimal) and isinstance(result["mixed"][1], Decimal)